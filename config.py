@@ -27,10 +27,28 @@ class AppConfig:
     HOST = "0.0.0.0" 
     PORT = 5000       
     DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+    # Server processes when not in debug mode (same variable uvicorn's CLI reads)
+    # Defaults to one: download/stream limits and caches are per process,
+    # so each extra worker multiplies them
+    WEB_WORKERS = int(os.getenv("WEB_CONCURRENCY", 1))
     
     
     DOWNLOADS_DIR = "downloads"
     MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB limit
+    STREAM_CHUNK_SIZE = 1024 * 1024  # 1MB per read when streaming files to users
+    MAX_CONCURRENT_DOWNLOADS = int(os.getenv("MAX_CONCURRENT_DOWNLOADS", 8))  # yt-dlp jobs at once
+    # Threads for blocking yt-dlp downloads - one per admitted download plus
+    # headroom; they mostly wait on network and ffmpeg, so CPU count doesn't matter
+    DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", MAX_CONCURRENT_DOWNLOADS + 2))
+    METADATA_WORKERS = 4  # Threads for previews, short-link expansion and direct stream lookups
+    MAX_DOWNLOADS_PER_HOST = 4  # Simultaneous downloads from the same site
+    MAX_CONCURRENT_STREAMS = int(os.getenv("MAX_CONCURRENT_STREAMS", 8))  # /api/stream-download responses at once
+    MAX_POOLED_YDL = 16  # Idle yt-dlp instances kept for reuse across all option sets
+    INFO_CACHE_TTL = 60  # Seconds to reuse extracted media info for the same URL
+    INFO_CACHE_MAX_ENTRIES = 1024  # Most URLs whose media info is kept at once
+    CLEANUP_INTERVAL = 600  # Seconds between sweeps for abandoned downloads
+    CLEANUP_MAX_FILE_AGE = 1800  # Downloads older than this are considered abandoned
+    CLEANUP_MIN_INTERVAL = 60  # /api/cleanup does nothing if it ran this recently
     
     
     SUPPORTED_FORMATS = {
@@ -51,6 +69,9 @@ class AppConfig:
         }
     }
     
+    # Upper-case format names for quick membership checks
+    _SUPPORTED_FORMATS_SET = frozenset(SUPPORTED_FORMATS)
+    
     
     YT_DLP_OPTIONS = {
         "outtmpl": f"{DOWNLOADS_DIR}/%(title)s.%(ext)s",  # Where to save files
@@ -119,8 +140,10 @@ class AppConfig:
         """
         Check if a format is supported
         Used for validation before attempting download
+        Callers usually pass an already upper-cased value, so try that first
         """
-        return format_type.upper() in cls.SUPPORTED_FORMATS
+        return (format_type in cls._SUPPORTED_FORMATS_SET
+                or format_type.upper() in cls._SUPPORTED_FORMATS_SET)
     
     @classmethod
     def get_quality_options(cls, format_type: str) -> List[str]:
@@ -4,32 +4,197 @@ This handles the actual downloading of media from various platforms
 Created by: Ritu Raj Singh
 """
 
-import yt_dlp
 import os
+import atexit
 import asyncio
+import concurrent.futures
+import contextlib
+import copy
+import functools
 import logging
 from typing import Dict, Any, Optional
 from config import AppConfig
 import re
-import uuid
+import time
+import types
+import secrets
+import threading
+from urllib.parse import urlparse
 
 # Set up logging for download operations
 logger = logging.getLogger(__name__)
 
+# Filename sanitization tables (used on every download)
+# str.translate swaps these characters (and ASCII whitespace) for underscores
+# in a single C-level pass: <>:"/\|?*()[]{}#%&=+@!$,;'`~
+_UNSAFE_CHARS = str.maketrans(dict.fromkeys('<>:"/\\|?*()[]{}#%&=+@!$,;\'`~ \t\r\n\f\v', '_'))
+# Then runs of underscores collapse into one; lone underscores are left alone,
+# and any remaining (non-ASCII) whitespace is replaced as well
+_UNDERSCORE_RUNS = re.compile(r'[\s_]{2,}|\s')
+
+# Ensure downloads directory exists (once, at import time)
+os.makedirs(AppConfig.DOWNLOADS_DIR, exist_ok=True)
+
+# Aggressive YouTube bot detection bypass (2025 approach)
+_BASE_EXTRACTOR_ARGS = {
+    'youtube': {
+        # Use embedded client - most reliable for bot detection bypass
+        'player_client': ['android_embedded', 'android_creator'],
+        'player_skip': ['webpage', 'configs', 'js', 'initial_data'],
+        'comment_sort': ['top'],
+        'max_comments': [0],
+        'innertube_host': 'youtubei.googleapis.com',
+        'innertube_key': None,  # Auto-detect
+        'formats': 'missing_pot',  # Critical: allow missing PO token
+        'skip': ['dash', 'hls', 'translated_subs'],
+        # Bypass visitor data requirements
+        'visitor_data': None,
+        # Use mobile API endpoints
+        'api_key': None,
+    }
+}
+
+# Anti-detection measures using Android client
+_BASE_HTTP_HEADERS = types.MappingProxyType({
+    'User-Agent': 'com.google.android.youtube/17.36.4 (Linux; U; Android 12; GB) gzip',
+    'Accept': '*/*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Origin': 'https://www.youtube.com',
+    'Referer': 'https://www.youtube.com/',
+    'X-YouTube-Client-Name': '1',
+    'X-YouTube-Client-Version': '2.20231214.01.00',
+    # No explicit Connection header - leave keep-alive to the HTTP handler
+    # so it can manage and reuse its pooled connections
+})
+
+# Optimized yt-dlp options for faster downloads
+# Only flat values live here; the nested dicts above are copied in per
+# options set by _prepare_options, so they're never shared or mutated
+_BASE_OPTIONS = {
+    'outtmpl': os.path.join(AppConfig.DOWNLOADS_DIR, '%(title)s.%(ext)s'),
+    'noplaylist': True,  # Don't download entire playlists
+    'extract_flat': False,  # Get full metadata
+    'ignoreerrors': True,  # Continue on minor errors
+    
+    # Disable problematic features that cause fragmented downloads
+    'no_part': True,  # Don't use .part files
+    'retries': 5,  # Reasonable retry count
+    'fragment_retries': 5,  # Fragment retry count
+    'socket_timeout': 60,  # Longer timeout for stability
+    'geo_bypass': True,  # Bypass geographic restrictions
+    
+    # Avoid HLS/DASH fragmented streams that cause range errors
+    'format_sort': ['proto:http', 'proto:https'],
+    
+    # Quality optimizations
+    'writesubtitles': False,  # Skip subtitles
+    'writeautomaticsub': False,  # Skip auto-generated subs
+    'writethumbnail': False,  # Skip thumbnail download
+    'writeinfojson': False,  # Skip metadata file
+    'embed_chapters': False,  # Skip chapters
+    'embed_subs': False,  # Skip embedded subtitles
+    
+    # Additional stability options
+    'age_limit': None,  # Don't restrict age-limited content
+    'no_check_certificate': False,  # Use proper SSL verification
+    'prefer_ffmpeg': True,  # Prefer ffmpeg for processing
+    
+    
+    # No sleep intervals here - the fast path shouldn't idle between
+    # requests; polite delays are only added by _get_fallback_options
+}
+
+# Enhanced YouTube extraction settings used by the fallback attempt
+_FALLBACK_EXTRACTOR_ARGS = {
+    'youtube': {
+        'player_client': ['android_creator', 'android_music', 'android_embedded', 'android'],
+        'player_skip': ['webpage', 'configs', 'js'],
+        'skip': ['translated_subs', 'dash', 'hls'],
+        'lang': ['en'],
+        'include_live_dash': [False],
+        'innertube_host': 'youtubei.googleapis.com',
+        'formats': 'missing_pot'  # Allow formats without PO token
+    }
+}
+
+# yt-dlp format selectors for fixed (format, quality) choices
+# (see _get_format_selector); MP4 selectors avoid fragmented streams
+_FORMAT_SELECTORS = {
+    # Prefer single-file progressive downloads
+    ("MP4", "best"): "best[protocol^=http][ext=mp4]/best[protocol^=https][ext=mp4]/best[ext=mp4]/best",
+    ("MP4", "worst"): "worst[protocol^=http][ext=mp4]/worst[ext=mp4]/worst",
+    ("MP3", "best"): "bestaudio/best",
+    ("MP3", "worst"): "worstaudio/worst",
+    # Prefer high quality images
+    ("IMAGE", "best"): "best[ext=jpg]/best[ext=png]/best[ext=webp]/best",
+    ("IMAGE", "original"): "best",
+}
+
+# Selectors for qualities not listed above
+_DEFAULT_FORMAT_SELECTORS = {
+    "MP4": "best[protocol^=http][ext=mp4]/best[ext=mp4]/best",
+    "MP3": "bestaudio/best",
+    "IMAGE": "best[ext=jpg]/best[ext=png]/best[ext=webp]/best",
+}
+
+# Templates for a specific resolution (720p) or audio bitrate (320k)
+_MP4_HEIGHT_SELECTOR = "best[height<={height}][protocol^=http][ext=mp4]/best[height<={height}][ext=mp4]/best[height<={height}]".format
+_MP3_BITRATE_SELECTOR = "bestaudio[abr<={abr}]/bestaudio".format
+
+# Basic options for info extraction only (see _extract_info)
+_INFO_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'extract_flat': False,
+}
+
+# URL prefixes accepted for downloads
+_URL_SCHEMES = ('http://', 'https://')
+
+# MIME type sent to the browser for each download format
+_CONTENT_TYPES = {
+    "MP4": "video/mp4",
+    "MP3": "audio/mpeg",
+    "IMAGE": "image/jpeg",
+}
+
+# Units for human readable file sizes (see _format_filesize)
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+# Popular platforms shown to users (see get_supported_sites)
+_POPULAR_SITES = (
+    "youtube", "instagram", "twitter", "pinterest", "tiktok",
+    "facebook", "vimeo", "dailymotion", "reddit"
+)
+
+def _progress_hook(d):
+    """
+    Log download progress reported by yt-dlp
+    Stateless, so pooled YoutubeDL instances can share it across requests
+    """
+    if d['status'] == 'downloading':
+        # Called many times a second, so skip the work when INFO is off
+        speed = d.get('speed', 0)
+        if speed and logger.isEnabledFor(logging.INFO):
+            logger.info("Download speed: %.1f MB/s", speed / 1048576)
+    elif d['status'] == 'finished':
+        logger.info("Download finished: %s", d['filename'])
+
 class MediaDownloader:
     """
     Handles media downloading using yt-dlp library
     This class encapsulates all the download logic and error handling
     """
     
+    # Supported sites are computed once per process (see get_supported_sites_full)
+    _supported_sites_cache = None
+    
     def __init__(self):
         """
         Initialize the downloader with default settings
         Sets up the basic configuration for yt-dlp with long-term stability
         """
-        # Ensure downloads directory exists
-        os.makedirs(AppConfig.DOWNLOADS_DIR, exist_ok=True)
-        
         # Initialize fallback user agents for rotation
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -40,74 +205,42 @@ class MediaDownloader:
         ]
         self.current_ua_index = 0
         
-        # Optimized yt-dlp options for faster downloads
-        self.base_options = {
-            'outtmpl': os.path.join(AppConfig.DOWNLOADS_DIR, '%(title)s.%(ext)s'),
-            'noplaylist': True,  # Don't download entire playlists
-            'extract_flat': False,  # Get full metadata
-            'ignoreerrors': True,  # Continue on minor errors
-            
-            # Disable problematic features that cause fragmented downloads
-            'no_part': True,  # Don't use .part files
-            'retries': 5,  # Reasonable retry count
-            'fragment_retries': 5,  # Fragment retry count
-            'socket_timeout': 60,  # Longer timeout for stability
-            'geo_bypass': True,  # Bypass geographic restrictions
-            
-            # Avoid HLS/DASH fragmented streams that cause range errors
-            'format_sort': ['proto:http', 'proto:https'],
-            
-            # Quality optimizations
-            'writesubtitles': False,  # Skip subtitles
-            'writeautomaticsub': False,  # Skip auto-generated subs
-            'writethumbnail': False,  # Skip thumbnail download
-            'writeinfojson': False,  # Skip metadata file
-            'embed_chapters': False,  # Skip chapters
-            'embed_subs': False,  # Skip embedded subtitles
-            
-            # Aggressive YouTube bot detection bypass (2025 approach)
-            'extractor_args': {
-                'youtube': {
-                    # Use embedded client - most reliable for bot detection bypass
-                    'player_client': ['android_embedded', 'android_creator'],
-                    'player_skip': ['webpage', 'configs', 'js', 'initial_data'],
-                    'comment_sort': ['top'],
-                    'max_comments': [0],
-                    'innertube_host': 'youtubei.googleapis.com',
-                    'innertube_key': None,  # Auto-detect
-                    'formats': 'missing_pot',  # Critical: allow missing PO token
-                    'skip': ['dash', 'hls', 'translated_subs'],
-                    # Bypass visitor data requirements
-                    'visitor_data': None,
-                    # Use mobile API endpoints
-                    'api_key': None,
-                }
-            },
-            
-            # Additional stability options
-            'age_limit': None,  # Don't restrict age-limited content
-            'ignoreerrors': True,  # Continue on errors
-            'no_check_certificate': False,  # Use proper SSL verification
-            'prefer_ffmpeg': True,  # Prefer ffmpeg for processing
-            
-            # Anti-detection measures using Android client
-            'http_headers': {
-                'User-Agent': 'com.google.android.youtube/17.36.4 (Linux; U; Android 12; GB) gzip',
-                'Accept': '*/*',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Origin': 'https://www.youtube.com',
-                'Referer': 'https://www.youtube.com/',
-                'X-YouTube-Client-Name': '1',
-                'X-YouTube-Client-Version': '2.20231214.01.00',
-                'Connection': 'keep-alive',
-            },
-            
-            # Bypass restrictions and rate limiting
-            'sleep_interval': 1,  # Small delay between requests
-            'max_sleep_interval': 5,  # Maximum sleep interval
-            'sleep_interval_requests': 1,  # Sleep between subtitle requests
-        }
+        # Prepared options per (format_type, quality), see _prepare_options
+        self._options_cache = {}
+        
+        # Idle YoutubeDL instances per options key, see _acquire_ydl
+        self._ydl_pool = {}
+        # Guards _ydl_pool and lazy creation of _http_session, which are
+        # used from both the event loop and executor threads
+        self._pool_lock = threading.Lock()
+        
+        # Recently extracted media info per URL, see _extract_info
+        self._info_cache = {}
+        
+        # Expanded short links (pin.it), see _expand_short_url
+        self._short_url_cache = {}
+        
+        # Shared HTTP session for our own requests, see _get_http_session
+        self._http_session = None
+        
+        # Limits on simultaneous downloads, overall and per host
+        self._download_slots = asyncio.Semaphore(AppConfig.MAX_CONCURRENT_DOWNLOADS)
+        self._host_semaphores = {}
+        
+        # Dedicated, bounded pool for blocking yt-dlp calls so downloads can't
+        # starve the default executor that the rest of the app relies on
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=AppConfig.DOWNLOAD_WORKERS,
+            thread_name_prefix="ydl"
+        )
+        # Short metadata lookups (previews, short links, direct stream
+        # resolution) get their own pool so they never queue behind
+        # downloads that run for minutes
+        self._metadata_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=AppConfig.METADATA_WORKERS,
+            thread_name_prefix="ydl-meta"
+        )
+        atexit.register(self.close)
     
     def _sanitize_filename(self, filename: str) -> str:
         """
@@ -121,21 +254,12 @@ class MediaDownloader:
             Sanitized filename safe for filesystem
         """
         # Remove or replace problematic characters that cause URL encoding issues
-        # This includes: <>:"/\|?*()[]{}#%&=+@!$,;'`~
-        filename = re.sub(r'[<>:"/\\|?*()[\]{}#%&=+@!$,;\'`~]', '_', filename)
-        filename = re.sub(r'\s+', '_', filename)  # Replace spaces with underscores
-        filename = re.sub(r'_+', '_', filename)  # Replace multiple underscores with single
-        filename = filename.strip('._')  # Remove leading/trailing dots and underscores
+        filename = filename.translate(_UNSAFE_CHARS)
+        filename = _UNDERSCORE_RUNS.sub('_', filename)  # Spaces and repeated underscores
         
-        # Ensure filename isn't too long
-        if len(filename) > 150:
-            filename = filename[:150]
-        
-        # Ensure filename is not empty
-        if not filename:
-            filename = "downloaded_media"
-        
-        return filename
+        # Remove leading/trailing dots and underscores, cap the length
+        # and make sure the filename is not empty
+        return filename.strip('._')[:150] or "downloaded_media"
     
     def _get_next_user_agent(self):
         """
@@ -152,21 +276,15 @@ class MediaDownloader:
         """
         fallback_options = original_options.copy()
         
+        # Fresh headers dict - the shallow copy above still shares the nested
+        # one with the cached primary options, which must not be modified
+        fallback_options['http_headers'] = dict(original_options.get('http_headers', {}))
+        
         # Use different user agent
         fallback_options['http_headers']['User-Agent'] = self._get_next_user_agent()
         
         # Enhanced YouTube extraction settings to bypass bot detection
-        fallback_options['extractor_args'] = {
-            'youtube': {
-                'player_client': ['android_creator', 'android_music', 'android_embedded', 'android'],
-                'player_skip': ['webpage', 'configs', 'js'],
-                'skip': ['translated_subs', 'dash', 'hls'],
-                'lang': ['en'],
-                'include_live_dash': [False],
-                'innertube_host': 'youtubei.googleapis.com',
-                'formats': 'missing_pot'  # Allow formats without PO token
-            }
-        }
+        fallback_options['extractor_args'] = _FALLBACK_EXTRACTOR_ARGS
         
         # Use Android app user agent to avoid bot detection
         fallback_options['http_headers']['User-Agent'] = 'com.google.android.youtube/17.36.4 (Linux; U; Android 12; GB) gzip'
@@ -183,59 +301,66 @@ class MediaDownloader:
         if 'format_sort' in fallback_options:
             del fallback_options['format_sort']
         
+        # Back off a little in case the first attempt was rate limited
+        fallback_options.update({
+            'sleep_interval': 1,  # Small delay between requests
+            'max_sleep_interval': 5,  # Maximum sleep interval
+            'sleep_interval_requests': 1,  # Sleep between extractor requests
+        })
+        
         return fallback_options
     
-    def _get_format_selector(self, format_type: str, quality: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _get_format_selector(format_type: str, quality: str) -> str:
         """
         Generate yt-dlp format selector based on user preferences
         Different formats need different selectors for optimal downloads
+        The result only depends on the arguments, so it's memoized
         
         Args:
-            format_type: MP4, MP3, or IMAGE
+            format_type: MP4, MP3, or IMAGE (already upper-cased by the caller)
             quality: Quality preference (best, worst, specific resolution)
             
         Returns:
             Format selector string for yt-dlp
         """
-        format_type = format_type.upper()
+        selector = _FORMAT_SELECTORS.get((format_type, quality))
+        if selector is not None:
+            return selector
         
-        if format_type == "MP4":
-            # Avoid fragmented streams completely
-            if quality == "best":
-                # Prefer single-file progressive downloads
-                return "best[protocol^=http][ext=mp4]/best[protocol^=https][ext=mp4]/best[ext=mp4]/best"
-            elif quality == "worst":
-                return "worst[protocol^=http][ext=mp4]/worst[ext=mp4]/worst"
-            elif quality.endswith("p"):
-                # Specific resolution - avoid fragmented streams
-                height = quality[:-1]
-                return f"best[height<={height}][protocol^=http][ext=mp4]/best[height<={height}][ext=mp4]/best[height<={height}]"
-            else:
-                return "best[protocol^=http][ext=mp4]/best[ext=mp4]/best"
-                
-        elif format_type == "MP3":
-            # Audio format selectors
-            if quality == "best":
-                return "bestaudio/best"
-            elif quality == "worst":
-                return "worstaudio/worst"
-            elif quality.endswith("k"):
-                # Specific bitrate like 320k, 256k
-                return f"bestaudio[abr<={quality[:-1]}]/bestaudio"
-            else:
-                return "bestaudio/best"
-                
-        elif format_type == "IMAGE":
-            # Image format selectors - prefer high quality images
-            if quality == "best":
-                return "best[ext=jpg]/best[ext=png]/best[ext=webp]/best"
-            elif quality == "original":
-                return "best"
-            else:
-                return "best[ext=jpg]/best[ext=png]/best[ext=webp]/best"
+        if format_type == "MP4" and quality.endswith("p"):
+            # Specific resolution - avoid fragmented streams
+            return _MP4_HEIGHT_SELECTOR(height=quality[:-1])
+        if format_type == "MP3" and quality.endswith("k"):
+            # Specific bitrate like 320k, 256k
+            return _MP3_BITRATE_SELECTOR(abr=quality[:-1])
         
-        # Default fallback
-        return "best"
+        # Anything else gets the format's default, or plain "best"
+        return _DEFAULT_FORMAT_SELECTORS.get(format_type, "best")
+    
+    @staticmethod
+    def _normalize_quality(format_type: str, quality: str) -> str:
+        """
+        Map the requested quality onto the set of values that change options
+        Quality is free text from the request; anything we don't recognise
+        gets the format's default selector anyway, so it shares one key
+        ("default") in the option cache and YoutubeDL pool
+        
+        Args:
+            format_type: MP4, MP3, or IMAGE (already upper-cased)
+            quality: Quality preference from the request
+            
+        Returns:
+            The quality itself if it's meaningful for the format, else "default"
+        """
+        if (format_type, quality) in _FORMAT_SELECTORS:
+            return quality
+        if format_type == "MP4" and quality.endswith("p") and quality[:-1].isdigit():
+            return quality
+        if format_type == "MP3" and quality.endswith("k") and quality[:-1].isdigit():
+            return quality
+        return "default"
     
     def _prepare_options(self, format_type: str, quality: str) -> Dict[str, Any]:
         """
@@ -243,14 +368,26 @@ class MediaDownloader:
         This configures yt-dlp for the specific type of media we want
         
         Args:
-            format_type: Type of media (MP4, MP3, IMAGE)
+            format_type: Type of media (MP4, MP3, IMAGE), already upper-cased
             quality: Quality preference
             
         Returns:
             Dictionary of options for yt-dlp
         """
-        options = self.base_options.copy()
-        format_type = format_type.upper()
+        # Options only depend on (format, quality), so build each combination
+        # once and hand out a shallow copy the caller is free to modify
+        cache_key = (format_type, quality)
+        cached = self._options_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+        
+        # _BASE_OPTIONS is flat, so a shallow merge is enough; only the
+        # nested headers and extractor args get their own copies
+        options = {
+            **_BASE_OPTIONS,
+            'http_headers': dict(_BASE_HTTP_HEADERS),
+            'extractor_args': copy.deepcopy(_BASE_EXTRACTOR_ARGS),
+        }
         
         # Set format selector
         options['format'] = self._get_format_selector(format_type, quality)
@@ -277,6 +414,9 @@ class MediaDownloader:
             
         elif format_type == "MP4":
             # Only convert if absolutely necessary - prefer native MP4
+            # yt-dlp skips this step when the downloaded file is already mp4
+            # (the output name now keeps the real extension, so it can tell);
+            # it only runs for non-mp4 fallback formats
             options['postprocessors'] = [{
                 'key': 'FFmpegVideoConvertor',
                 'preferedformat': 'mp4',
@@ -285,7 +425,202 @@ class MediaDownloader:
         # Add file size limit to prevent huge downloads
         options['max_filesize'] = AppConfig.MAX_FILE_SIZE
         
-        return options
+        # Quality comes from the request, so keep the cache bounded
+        if len(self._options_cache) < 64:
+            self._options_cache[cache_key] = options
+        
+        return dict(options)
+    
+    def _acquire_ydl(self, key, options: Dict[str, Any]):
+        """
+        Get an idle YoutubeDL instance for these options, or build a new one
+        Building a YoutubeDL sets up its extractors and opener, so reusing
+        instances keeps that work off the per-request path
+        
+        Args:
+            key: Pool key that uniquely identifies the options
+            options: yt-dlp options used if a new instance is needed
+            
+        Returns:
+            YoutubeDL instance owned by the caller until _release_ydl
+        """
+        import yt_dlp
+        
+        # The pool is used from the event loop and from executor threads
+        # (_get_direct_media), so only touch it while holding the lock
+        with self._pool_lock:
+            idle = self._ydl_pool.get(key)
+            if idle:
+                ydl = idle.pop()
+                if not idle:
+                    # Don't keep empty entries around for one-off keys
+                    del self._ydl_pool[key]
+                return ydl
+        return yt_dlp.YoutubeDL(options)
+    
+    def _release_ydl(self, key, ydl):
+        """
+        Return a YoutubeDL instance to the pool once a download is done
+        Instances are never shared between concurrent downloads
+        """
+        # At most 4 idle instances per key and MAX_POOLED_YDL overall, since
+        # keys partly come from the request
+        with self._pool_lock:
+            total_idle = sum(len(idle) for idle in self._ydl_pool.values())
+            idle = self._ydl_pool.get(key, [])
+            if len(idle) < 4 and total_idle < AppConfig.MAX_POOLED_YDL:
+                idle.append(ydl)
+                self._ydl_pool[key] = idle
+                return
+        # Closing can take a moment, so do it outside the lock
+        ydl.close()
+    
+    @contextlib.asynccontextmanager
+    async def _host_slot(self, url: str):
+        """
+        Hold one of the limited download slots for the URL's host
+        A host's semaphore only exists while downloads from it are running
+        or waiting, so user-supplied hosts can't pile up in memory
+        
+        Args:
+            url: URL of the media being downloaded
+        """
+        host = urlparse(url).netloc.lower()
+        entry = self._host_semaphores.get(host)
+        if entry is None:
+            # [semaphore, number of downloads holding or waiting for it]
+            entry = [asyncio.Semaphore(AppConfig.MAX_DOWNLOADS_PER_HOST), 0]
+            self._host_semaphores[host] = entry
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._host_semaphores[host]
+    
+    def _get_http_session(self):
+        """
+        Get the shared requests session, creating it on first use
+        A single session keeps connections alive between requests, so
+        repeated calls to the same host skip the TCP+TLS handshake
+        """
+        if self._http_session is None:
+            # Also called from executor threads - make sure only one is created
+            with self._pool_lock:
+                if self._http_session is None:
+                    import requests
+                    self._http_session = requests.Session()
+        return self._http_session
+    
+    def close(self):
+        """
+        Close all pooled YoutubeDL instances, the HTTP session and the thread pools
+        Registered with atexit so open handles are released on shutdown
+        """
+        self._executor.shutdown(wait=False)
+        self._metadata_executor.shutdown(wait=False)
+        
+        if self._http_session is not None:
+            self._http_session.close()
+        
+        with self._pool_lock:
+            pooled = [ydl for idle in self._ydl_pool.values() for ydl in idle]
+            self._ydl_pool.clear()
+        for ydl in pooled:
+            try:
+                ydl.close()
+            except Exception as e:
+                logger.error("Failed to close YoutubeDL instance: %s", e)
+    
+    def _get_cached_info(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Return media info extracted for this URL within the cache TTL, if any
+        """
+        cached = self._info_cache.get(url)
+        if cached and time.monotonic() - cached[0] < AppConfig.INFO_CACHE_TTL:
+            logger.info("Using cached media info for: %s", url)
+            return cached[1]
+        return None
+    
+    async def _extract_info(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract media info for a preview, reusing a recent result for the URL
+        Repeated previews of the same link skip the metadata round-trip;
+        downloads always extract fresh with their own options
+        
+        Args:
+            url: URL of the media to analyze
+            
+        Returns:
+            yt-dlp info dictionary (or None if nothing could be extracted)
+        """
+        cached = self._get_cached_info(url)
+        if cached is not None:
+            return cached
+        
+        # Pooled instances keep their HTTP opener, so connections to the
+        # same host can be reused instead of a fresh TCP+TLS handshake
+        # YoutubeDL keeps (and fills in) the params dict it's given, so each
+        # instance gets its own copy rather than the shared module constant
+        ydl = self._acquire_ydl(("info",), dict(_INFO_OPTIONS))
+        try:
+            # Network round-trip - keep it off the event loop
+            loop = asyncio.get_running_loop()
+            info = await loop.run_in_executor(self._metadata_executor, ydl.extract_info, url, False)
+        finally:
+            self._release_ydl(("info",), ydl)
+        
+        if info:
+            # Drop expired entries so the cache can't grow without bound
+            now = time.monotonic()
+            self._info_cache = {
+                key: value for key, value in self._info_cache.items()
+                if now - value[0] < AppConfig.INFO_CACHE_TTL
+            }
+            # Also cap the entry count; entries are in insertion order, so
+            # the first one is the oldest
+            while len(self._info_cache) >= AppConfig.INFO_CACHE_MAX_ENTRIES:
+                del self._info_cache[next(iter(self._info_cache))]
+            self._info_cache[url] = (now, info)
+        
+        return info
+    
+    async def _expand_short_url(self, url: str) -> str:
+        """
+        Follow redirects of a shortened URL (like Pinterest pin.it)
+        The HEAD request runs off the event loop and results are remembered,
+        so repeated short links don't cost another round-trip
+        
+        Args:
+            url: Shortened URL
+            
+        Returns:
+            Full URL, or the original one if it couldn't be expanded
+        """
+        cached = self._short_url_cache.get(url)
+        if cached:
+            return cached
+        
+        try:
+            # Follow redirect to get full Pinterest URL
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                self._metadata_executor,
+                functools.partial(self._get_http_session().head, url, allow_redirects=True, timeout=10)
+            )
+            expanded = response.url
+            logger.info("Expanded Pinterest URL to: %s", expanded)
+        except Exception as e:
+            logger.warning("Could not expand Pinterest URL: %s", e)
+            return url
+        
+        # Short links don't change, but keep the cache bounded anyway
+        if len(self._short_url_cache) >= 1024:
+            self._short_url_cache.clear()
+        self._short_url_cache[url] = expanded
+        return expanded
     
     async def download_media(self, url: str, format_type: str, quality: str = "best") -> Dict[str, Any]:
         """
@@ -300,8 +635,16 @@ class MediaDownloader:
         Returns:
             Dictionary with success status and file information or error message
         """
+        # yt-dlp pulls in hundreds of extractor modules, so only import it
+        # once we actually need it (Python caches it after the first call)
+        import yt_dlp
+        
+        # Normalize once here; helpers below expect the upper-cased value
+        format_type = format_type.upper()
+        quality = self._normalize_quality(format_type, quality)
+        
         try:
-            logger.info(f"Starting download: {url} as {format_type} quality {quality}")
+            logger.info("Starting download: %s as %s quality %s", url, format_type, quality)
             
             # Validate and expand shortened URLs (like Pinterest pin.it)
             if not url:
@@ -312,16 +655,9 @@ class MediaDownloader:
             
             # Handle Pinterest shortened URLs
             if 'pin.it' in url:
-                import requests
-                try:
-                    # Follow redirect to get full Pinterest URL
-                    response = requests.head(url, allow_redirects=True)
-                    url = response.url
-                    logger.info(f"Expanded Pinterest URL to: {url}")
-                except Exception as e:
-                    logger.warning(f"Could not expand Pinterest URL: {e}")
-            
-            if not url.startswith(('http://', 'https://')):
+                url = await self._expand_short_url(url)
+            
+            if not url.startswith(_URL_SCHEMES):
                 return {
                     "success": False,
                     "error": "Invalid URL provided"
@@ -337,171 +673,170 @@ class MediaDownloader:
             options = self._prepare_options(format_type, quality)
             
             # Generate unique filename to avoid conflicts
-            unique_id = str(uuid.uuid4())[:8]
-            
-            # First, extract info to check if URL is valid
-            with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
-                try:
-                    logger.info("Extracting media information...")
-                    info = ydl.extract_info(url, download=False)
-                    
-                    if not info:
-                        return {
-                            "success": False,
-                            "error": "Could not extract media information from URL"
-                        }
-                    
-                    # Get media title for filename
-                    title = info.get('title', 'unknown')
-                    title = self._sanitize_filename(title)
-                    
-                    # Determine file extension based on format
-                    if format_type.upper() == "MP3":
-                        ext = "mp3"
-                    elif format_type.upper() == "MP4":
-                        ext = "mp4"
-                    else:
-                        # For images, use original extension or default to jpg
-                        ext = info.get('ext', 'jpg')
-                    
-                    # Create final filename with unique ID
-                    filename = f"{title}_{unique_id}.{ext}"
-                    filepath = os.path.join(AppConfig.DOWNLOADS_DIR, filename)
-                    
-                except yt_dlp.DownloadError as e:
-                    logger.error(f"yt-dlp info extraction error: {str(e)}")
-                    return {
-                        "success": False,
-                        "error": f"Failed to extract info: {str(e)}"
-                    }
+            unique_id = secrets.token_hex(4)
             
-            
-            options['outtmpl'] = filepath
-            
-            # Add progress hook for better performance tracking
-            def progress_hook(d):
-                if d['status'] == 'downloading':
-                    speed = d.get('speed', 0)
-                    if speed:
-                        logger.info(f"Download speed: {speed/1024/1024:.1f} MB/s")
-                elif d['status'] == 'finished':
-                    logger.info(f"Download finished: {d['filename']}")
-            
-            options['progress_hooks'] = [progress_hook]
+            # yt-dlp writes to a temporary name based on the unique ID; the
+            # title only becomes known from the info the download itself
+            # extracts, so there's no separate metadata round-trip beforehand
+            outtmpl = os.path.join(AppConfig.DOWNLOADS_DIR, f"{unique_id}.%(ext)s")
+            options['outtmpl'] = outtmpl
+            options['progress_hooks'] = [_progress_hook]
             
             # Try download with primary options first, then fallback if needed
             download_attempts = [options, self._get_fallback_options(options)]
+            info = None
             
-            for attempt_num, download_options in enumerate(download_attempts, 1):
-                try:
-                    download_options['outtmpl'] = filepath
-                    download_options['progress_hooks'] = [progress_hook]
+            # Cap concurrent yt-dlp jobs overall and per host so a burst of
+            # requests doesn't open a fresh connection to the same site for each
+            # The host slot comes first, so requests queued on a busy host
+            # don't sit on global slots other hosts could use
+            async with self._host_slot(url), self._download_slots:
+                for attempt_num, download_options in enumerate(download_attempts, 1):
+                    # Instances are pooled per (format, quality, attempt) since that
+                    # fully determines their options - only the output path differs
+                    pool_key = (format_type, quality, attempt_num)
+                    ydl = None
+                    try:
+                        download_options['outtmpl'] = outtmpl
+                        download_options['progress_hooks'] = [_progress_hook]
                     
-                    logger.info(f"Download attempt {attempt_num}: {filepath}")
+                        logger.info("Download attempt %s: %s", attempt_num, outtmpl)
                     
-                    with yt_dlp.YoutubeDL(download_options) as ydl:
-                        # Use thread pool executor with optimized settings for faster execution
-                        import concurrent.futures
-                        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                            loop = asyncio.get_event_loop()
-                            await loop.run_in_executor(
-                                executor, 
-                                lambda: ydl.download([url])
-                            )
+                        ydl = self._acquire_ydl(pool_key, download_options)
+                        ydl.params['outtmpl']['default'] = outtmpl
                     
-                    # If we reach here, download was successful
-                    break
+                        # Run the blocking download on our dedicated download pool
+                        # Each attempt extracts fresh with its own options - info
+                        # cached by a preview was fetched without our headers and
+                        # extractor args, and the fallback must not replay it
+                        loop = asyncio.get_running_loop()
+                        info = await loop.run_in_executor(self._executor, ydl.extract_info, url, True)
                     
-                except yt_dlp.DownloadError as e:
-                    logger.warning(f"Download attempt {attempt_num} failed: {str(e)}")
-                    if attempt_num >= len(download_attempts):
-                        # All attempts failed
-                        return {
-                            "success": False,
-                            "error": f"All download attempts failed. Last error: {str(e)}"
-                        }
-                    else:
-                        logger.info(f"Trying fallback configuration...")
+                        # With ignoreerrors yt-dlp reports failures by returning nothing
+                        if not info:
+                            raise yt_dlp.DownloadError("Could not extract media information from URL")
+                    
+                        # If we reach here, download was successful
+                        break
+                    
+                    except yt_dlp.DownloadError as e:
+                        logger.warning("Download attempt %s failed: %s", attempt_num, e)
+                        if attempt_num >= len(download_attempts):
+                            # All attempts failed
+                            return {
+                                "success": False,
+                                "error": f"All download attempts failed. Last error: {str(e)}"
+                            }
+                        else:
+                            logger.info("Trying fallback configuration...")
+                            continue
+                    except Exception as e:
+                        logger.error("Unexpected error in attempt %s: %s", attempt_num, e)
+                        if attempt_num >= len(download_attempts):
+                            return {
+                                "success": False,
+                                "error": f"Download failed: {str(e)}"
+                            }
                         continue
-                except Exception as e:
-                    logger.error(f"Unexpected error in attempt {attempt_num}: {str(e)}")
-                    if attempt_num >= len(download_attempts):
-                        return {
-                            "success": False,
-                            "error": f"Download failed: {str(e)}"
-                        }
-                    continue
-            
-            # Check if file was created successfully
-            if os.path.exists(filepath):
-                file_size = os.path.getsize(filepath)
-                logger.info(f"Download completed: {filename} ({file_size} bytes)")
-                
+                    finally:
+                        if ydl is not None:
+                            self._release_ydl(pool_key, ydl)
+            
+            # Get media title for filename
+            title = self._sanitize_filename(info.get('title', 'unknown'))
+            
+            # yt-dlp reports where the final (post-processed) file ended up
+            downloaded_path = None
+            requested = info.get('requested_downloads') or []
+            if requested:
+                downloaded_path = requested[0].get('filepath')
+            
+            if not downloaded_path or not os.path.exists(downloaded_path):
+                # Sometimes yt-dlp creates files with slightly different names
+                # Let's check for any files created during our download,
+                # stopping at the first match instead of listing everything
+                prefix = f"{unique_id}."
+                with os.scandir(AppConfig.DOWNLOADS_DIR) as entries:
+                    downloaded_path = next(
+                        (entry.path for entry in entries if entry.name.startswith(prefix)), None
+                    )
+            
+            if not downloaded_path:
                 return {
-                    "success": True,
-                    "filename": filename,
-                    "filepath": filepath,
-                    "title": title,
-                    "size": file_size
+                    "success": False,
+                    "error": "Download completed but file not found"
                 }
-            else:
-                # Sometimes yt-dlp creates files with slightly different names
-                # Let's check for any files created during our download
-                possible_files = [f for f in os.listdir(AppConfig.DOWNLOADS_DIR) 
-                                if f.startswith(title) and unique_id in f]
-                
-                if possible_files:
-                    actual_filename = possible_files[0]
-                    actual_filepath = os.path.join(AppConfig.DOWNLOADS_DIR, actual_filename)
-                    file_size = os.path.getsize(actual_filepath)
-                    
-                    return {
-                        "success": True,
-                        "filename": actual_filename,
-                        "filepath": actual_filepath,
-                        "title": title,
-                        "size": file_size
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": "Download completed but file not found"
-                    }
+            
+            # Give the file its final user-facing name with the unique ID
+            ext = os.path.splitext(downloaded_path)[1].lstrip('.') or info.get('ext', 'jpg')
+            filename = f"{title}_{unique_id}.{ext}"
+            filepath = os.path.join(AppConfig.DOWNLOADS_DIR, filename)
+            os.replace(downloaded_path, filepath)
+            
+            file_size = os.path.getsize(filepath)
+            logger.info("Download completed: %s (%s bytes)", filename, file_size)
+            
+            return {
+                "success": True,
+                "filename": filename,
+                "filepath": filepath,
+                "title": title,
+                "size": file_size
+            }
                     
         except Exception as e:
-            logger.error(f"Unexpected error during download: {str(e)}")
+            logger.error("Unexpected error during download: %s", e)
             return {
                 "success": False,
                 "error": f"An unexpected error occurred: {str(e)}"
             }
         
         except Exception as e:
-            logger.error(f"Error in download_media: {str(e)}")
+            logger.error("Error in download_media: %s", e)
             return {
                 "success": False,
                 "error": f"Failed to process download: {str(e)}"
             }
     
     def get_supported_sites(self) -> list:
+        """
+        Get list of popular supported sites
+        This is a fixed list, so it costs nothing and never imports yt-dlp;
+        use get_supported_sites_full for yt-dlp's own extractor list
+        
+        Returns:
+            List of supported site names
+        """
+        return list(_POPULAR_SITES)
+    
+    def get_supported_sites_full(self) -> list:
         """
         Get list of supported sites from yt-dlp
         This returns all the platforms that yt-dlp can handle
+        The extractor list never changes while the app is running,
+        so it's only built once and reused afterwards
         
         Returns:
             List of supported site names
         """
+        if MediaDownloader._supported_sites_cache is not None:
+            return list(MediaDownloader._supported_sites_cache)
+        
         try:
             # Get extractors from yt-dlp
+            import yt_dlp
             extractors = yt_dlp.list_extractors()
             # Return first 50 popular ones to avoid overwhelming the user
-            return [extractor.IE_NAME for extractor in extractors[:50] if hasattr(extractor, 'IE_NAME')]
+            MediaDownloader._supported_sites_cache = tuple(
+                extractor.IE_NAME for extractor in extractors[:50] if hasattr(extractor, 'IE_NAME')
+            )
+            return list(MediaDownloader._supported_sites_cache)
         except Exception as e:
-            logger.error(f"Error getting supported sites: {str(e)}")
-            # Return a basic list of popular platforms
-            return [
-                "youtube", "instagram", "twitter", "pinterest", "tiktok", 
-                "facebook", "vimeo", "dailymotion", "reddit"
-            ]
+            logger.error("Error getting supported sites: %s", e)
+            # Remember the basic list of popular platforms too, so a broken
+            # yt-dlp install isn't walked (and logged) again on every call
+            MediaDownloader._supported_sites_cache = _POPULAR_SITES
+            return list(_POPULAR_SITES)
     
     async def get_media_info(self, url: str) -> Dict[str, Any]:
         """
@@ -514,41 +849,35 @@ class MediaDownloader:
         Returns:
             Dictionary with media information or error
         """
+        import yt_dlp
+        
         try:
-            logger.info(f"Extracting info for: {url}")
-            
-            # Basic options for info extraction only
-            options = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': False,
-            }
+            logger.info("Extracting info for: %s", url)
             
-            with yt_dlp.YoutubeDL(options) as ydl:
-                try:
-                    # Extract info without downloading
-                    info = ydl.extract_info(url, download=False)
-                    
-                    if not info:
-                        return {"success": False, "error": "Could not extract media information"}
-                    
-                    # Clean and return useful information
-                    return {
-                        "success": True,
-                        "title": info.get('title', 'Unknown Title'),
-                        "duration": self._format_duration(info.get('duration')),
-                        "thumbnail": info.get('thumbnail'),
-                        "platform": info.get('extractor_key', 'Unknown'),
-                        "filesize": self._format_filesize(info.get('filesize')),
-                        "view_count": info.get('view_count'),
-                        "uploader": info.get('uploader', 'Unknown')
-                    }
-                    
-                except yt_dlp.DownloadError as e:
-                    return {"success": False, "error": f"Failed to extract info: {str(e)}"}
-                    
+            try:
+                # Extract info without downloading
+                info = await self._extract_info(url)
+                
+                if not info:
+                    return {"success": False, "error": "Could not extract media information"}
+                
+                # Clean and return useful information
+                return {
+                    "success": True,
+                    "title": info.get('title', 'Unknown Title'),
+                    "duration": self._format_duration(info.get('duration')),
+                    "thumbnail": info.get('thumbnail'),
+                    "platform": info.get('extractor_key', 'Unknown'),
+                    "filesize": self._format_filesize(info.get('filesize')),
+                    "view_count": info.get('view_count'),
+                    "uploader": info.get('uploader', 'Unknown')
+                }
+                
+            except yt_dlp.DownloadError as e:
+                return {"success": False, "error": f"Failed to extract info: {str(e)}"}
+                
         except Exception as e:
-            logger.error(f"Error extracting media info: {str(e)}")
+            logger.error("Error extracting media info: %s", e)
             return {"success": False, "error": str(e)}
     
     def _format_duration(self, duration) -> str:
@@ -559,15 +888,16 @@ class MediaDownloader:
             return "Unknown"
         
         try:
-            minutes, seconds = divmod(int(duration), 60)
-            hours, minutes = divmod(minutes, 60)
+            total = int(duration)
+            if total < 60:
+                return f"{total}s"
+            
+            hours, remainder = divmod(total, 3600)
+            minutes, seconds = divmod(remainder, 60)
             
             if hours > 0:
                 return f"{hours}h {minutes}m {seconds}s"
-            elif minutes > 0:
-                return f"{minutes}m {seconds}s"
-            else:
-                return f"{seconds}s"
+            return f"{minutes}m {seconds}s"
         except:
             return "Unknown"
     
@@ -579,19 +909,113 @@ class MediaDownloader:
             return "Unknown"
         
         try:
-            # Convert bytes to appropriate unit
-            for unit in ['B', 'KB', 'MB', 'GB']:
-                if filesize < 1024.0:
-                    return f"{filesize:.1f} {unit}"
-                filesize /= 1024.0
-            return f"{filesize:.1f} TB"
+            # Each unit is 2^10 bigger, so the bit length picks the unit directly
+            unit_index = min(max(int(filesize).bit_length() - 1, 0) // 10, len(_SIZE_UNITS) - 1)
+            return f"{filesize / (1 << (10 * unit_index)):.1f} {_SIZE_UNITS[unit_index]}"
         except:
             return "Unknown"
     
+    def _get_direct_media(self, url: str, format_type: str, quality: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve the direct source URL for a single-file format
+        Used by stream_download_media to skip the disk round-trip entirely
+        
+        Args:
+            url: URL of the media page
+            format_type: MP4 or IMAGE (formats that need no post-processing), upper-cased
+            quality: Quality preference
+            
+        Returns:
+            Dictionary with the opened source response and filename, or None
+            if the selected format can't be piped directly (fragmented, merged,
+            not mp4, too big, or the source refused the request)
+        """
+        options = {
+            'quiet': True,
+            'no_warnings': True,
+            'noplaylist': True,
+            'format': self._get_format_selector(format_type, quality),
+        }
+        
+        pool_key = ("direct", format_type, quality)
+        ydl = None
+        try:
+            ydl = self._acquire_ydl(pool_key, options)
+            info = ydl.extract_info(url, download=False)
+        except Exception as e:
+            logger.warning("Could not resolve direct stream, falling back to disk: %s", e)
+            return None
+        finally:
+            if ydl is not None:
+                self._release_ydl(pool_key, ydl)
+        
+        # Merged formats (separate video+audio) and fragmented HLS/DASH streams
+        # need yt-dlp/ffmpeg to assemble them, so they can't be piped as-is
+        if not info or info.get('requested_formats') or not info.get('url'):
+            return None
+        if info.get('protocol') not in ('http', 'https'):
+            return None
+        
+        # The selector can fall through to a non-mp4 "best" (e.g. webm); that
+        # must go through the disk path rather than be labelled as MP4
+        ext = info.get('ext') or 'jpg'
+        if format_type == "MP4" and ext != "mp4":
+            return None
+        
+        filesize = info.get('filesize') or info.get('filesize_approx')
+        if filesize and filesize > AppConfig.MAX_FILE_SIZE:
+            return None
+        
+        # Open the source now, before any response headers go out, so a
+        # refused or oversized source still falls back to the disk path
+        try:
+            response = self._get_http_session().get(
+                info['url'], headers=info.get('http_headers') or {}, stream=True, timeout=60
+            )
+        except Exception as e:
+            logger.warning("Could not open direct stream, falling back to disk: %s", e)
+            return None
+        
+        if not response.ok:
+            logger.warning("Direct source returned HTTP %s, falling back to disk", response.status_code)
+            response.close()
+            return None
+        
+        content_length = response.headers.get('Content-Length')
+        if content_length and content_length.isdigit() and int(content_length) > AppConfig.MAX_FILE_SIZE:
+            response.close()
+            return None
+        
+        title = self._sanitize_filename(info.get('title', 'unknown'))
+        unique_id = secrets.token_hex(4)
+        
+        return {
+            "response": response,
+            "filename": f"{title}_{unique_id}.{ext}",
+        }
+    
+    def _direct_stream(self, direct: Dict[str, Any]):
+        """
+        Generator that relays the source response to the client chunk by chunk
+        Memory use stays bounded to one chunk no matter how big the file is
+        """
+        received = 0
+        with direct["response"] as response:
+            for chunk in response.iter_content(chunk_size=AppConfig.STREAM_CHUNK_SIZE):
+                if chunk:
+                    # The size may not have been known up front, so enforce
+                    # the limit on what actually arrives
+                    received += len(chunk)
+                    if received > AppConfig.MAX_FILE_SIZE:
+                        raise ValueError(AppConfig.ERROR_MESSAGES["file_too_large"])
+                    yield chunk
+    
     async def stream_download_media(self, url: str, format_type: str, quality: str = "best") -> Dict[str, Any]:
         """
         Stream download media directly without saving to disk
         This ensures no data persistence on the server
+        Progressive MP4s and images are relayed straight from the source;
+        anything needing ffmpeg (e.g. MP3) is downloaded first, then streamed
         
         Args:
             url: URL of the media to download
@@ -599,49 +1023,49 @@ class MediaDownloader:
             quality: Quality preference
             
         Returns:
-            Dictionary with stream and metadata
+            Dictionary with either a "stream" generator or a "filepath"
+            to serve (and delete afterwards), plus metadata
         """
+        format_type = format_type.upper()
+        quality = self._normalize_quality(format_type, quality)
+        
         try:
-            logger.info(f"Starting stream download: {url} as {format_type}")
+            logger.info("Starting stream download: %s as %s", url, format_type)
             
-            # For now, we'll use the regular download and then stream the file
-            # In a production environment, you'd implement true streaming
+            # Determine content type
+            content_type = _CONTENT_TYPES.get(format_type, "application/octet-stream")
+            
+            # Single-file formats that need no ffmpeg post-processing can be
+            # piped straight from the source to the client, so the first byte
+            # goes out as soon as it arrives and nothing touches our disk
+            if format_type in ("MP4", "IMAGE") and url.startswith(_URL_SCHEMES):
+                loop = asyncio.get_running_loop()
+                direct = await loop.run_in_executor(
+                    self._metadata_executor, self._get_direct_media, url, format_type, quality
+                )
+                
+                if direct:
+                    logger.info("Streaming directly from source: %s", direct['filename'])
+                    return {
+                        "success": True,
+                        "stream": self._direct_stream(direct),
+                        "filename": direct["filename"],
+                        "content_type": content_type
+                    }
+            
+            # Otherwise (MP3 conversion, fragmented streams, ...) fall back to
+            # downloading to disk first and streaming the finished file
             result = await self.download_media(url, format_type, quality)
             
             if result["success"]:
                 filepath = result["filepath"]
                 filename = result["filename"]
                 
-                # Determine content type
-                content_type = "application/octet-stream"
-                if format_type.upper() == "MP4":
-                    content_type = "video/mp4"
-                elif format_type.upper() == "MP3":
-                    content_type = "audio/mpeg"
-                elif format_type.upper() == "IMAGE":
-                    content_type = "image/jpeg"
-                
-                # Create file stream generator
-                def file_generator():
-                    try:
-                        with open(filepath, "rb") as f:
-                            while True:
-                                chunk = f.read(8192)  # 8KB chunks
-                                if not chunk:
-                                    break
-                                yield chunk
-                    finally:
-                        # Clean up file after streaming
-                        try:
-                            if os.path.exists(filepath):
-                                os.remove(filepath)
-                                logger.info(f"Cleaned up temporary file: {filepath}")
-                        except Exception as e:
-                            logger.error(f"Failed to clean up file: {e}")
-                
+                # The caller opens the file, deletes it straight away and
+                # streams from the open handle
                 return {
                     "success": True,
-                    "stream": file_generator(),
+                    "filepath": filepath,
                     "filename": filename,
                     "content_type": content_type
                 }
@@ -649,5 +1073,5 @@ class MediaDownloader:
                 return result
                 
         except Exception as e:
-            logger.error(f"Error in stream download: {str(e)}")
+            logger.error("Error in stream download: %s", e)
             return {"success": False, "error": str(e)}
@@ -4,14 +4,26 @@ This is the main server file that handles all API endpoints
 Created by: Ritu Raj Singh
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from pydantic import BaseModel, field_validator
 import os
 import uvicorn
 import logging
 import asyncio
+import functools
+import json
+import mimetypes
+import shutil
+from urllib.parse import quote
+import time
+from typing import Optional
 from downloader import MediaDownloader
 from config import AppConfig
 
@@ -28,21 +40,278 @@ app = FastAPI(
     version="1.0.0"
 )
 
+class _MediaAwareGZipResponder(GZipResponder):
+    """
+    GZipResponder that also passes image, video and audio bodies through untouched
+    Starlette only excludes event streams; media is already compressed and gzip makes it bigger
+    """
+    async def send_with_compression(self, message):
+        await super().send_with_compression(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type", "")
+            if content_type.startswith(_UNCOMPRESSED_CONTENT_TYPES):
+                self.content_type_is_excluded = True
+
+class TextGZipMiddleware(GZipMiddleware):
+    """
+    Gzip HTML, JSON, CSS and JS responses but leave media alone
+    Download routes are skipped by path so files can still go out with sendfile,
+    and any other image/video/audio response (static logo, icons) is skipped by content type
+    """
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(_UNCOMPRESSED_PATHS):
+            await self.app(scope, receive, send)
+            return
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("accept-encoding", ""):
+            responder = _MediaAwareGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+# Routes that send media files as they are
+_UNCOMPRESSED_PATHS = ("/downloads/", "/api/stream-download")
+# Already-compressed media types that gzip would only make larger
+_UNCOMPRESSED_CONTENT_TYPES = ("image/", "video/", "audio/")
+
+# Compress text responses big enough to be worth it (index.html, scripts,
+# styles, media info); level 6 keeps CPU cost per request low
+app.add_middleware(TextGZipMiddleware, minimum_size=1024, compresslevel=6)
+
+class StreamLimitMiddleware:
+    """
+    Let only a limited number of /api/stream-download requests run at once
+    The slot is held until the response body is fully sent (or the client
+    goes away), so buffers and downloads are bounded; extra requests wait
+    """
+    def __init__(self, app, max_streams: int):
+        self.app = app
+        self.slots = asyncio.Semaphore(max_streams)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != "/api/stream-download":
+            await self.app(scope, receive, send)
+            return
+        
+        async with self.slots:
+            await self.app(scope, receive, send)
+
+app.add_middleware(StreamLimitMiddleware, max_streams=AppConfig.MAX_CONCURRENT_STREAMS)
+
+class RequestTimingMiddleware:
+    """
+    Log one line per request with method, path, status, size and duration
+    Plain ASGI (not @app.middleware) so streamed downloads pass straight
+    through; the time covers the whole response, body included
+    """
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not logger.isEnabledFor(logging.INFO):
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        status = 500
+        size = 0
+        
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            logger.info(
+                "%s %s -> %s (%s bytes, %.1f ms)",
+                scope["method"], scope["path"], status, size,
+                (time.perf_counter() - start) * 1000
+            )
+
+# Outermost, so timings include compression
+app.add_middleware(RequestTimingMiddleware)
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that sends a ready-made .gz copy of text assets when it can
+    The Docker build gzips static/*.js, *.css and *.html once, so serving
+    them costs no compression work per request; without a .gz copy the
+    original file is served (and compressed by TextGZipMiddleware)
+    """
+    def __init__(self, *, directory: str, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        # Static files don't change while we run, so find the .gz copies
+        # once instead of probing for one on every request
+        self.gz_paths = set()
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith(".gz") and name[:-3].endswith(_PRECOMPRESSED_EXTS):
+                    self.gz_paths.add(os.path.relpath(os.path.join(root, name[:-3]), directory))
+    
+    async def get_response(self, path: str, scope) -> Response:
+        if path in self.gz_paths and "gzip" in Headers(scope=scope).get("accept-encoding", ""):
+            try:
+                response = await super().get_response(f"{path}.gz", scope)
+            except StarletteHTTPException:
+                # The copy went away after startup - serve the original file
+                pass
+            else:
+                # Describe the original file, not the .gz wrapper
+                media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+                if media_type.startswith("text/"):
+                    media_type += "; charset=utf-8"
+                response.headers["content-type"] = media_type
+                response.headers["content-encoding"] = "gzip"
+                response.headers["vary"] = "Accept-Encoding"
+                return response
+        return await super().get_response(path, scope)
+
+# Static assets that may have a precompressed .gz copy
+_PRECOMPRESSED_EXTS = (".js", ".css", ".html")
+
 # Mount static files directory
 # This serves our HTML, CSS, and JavaScript files to users
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 # Note: We'll handle downloads manually to auto-delete files
 
 # Initialize our media downloader
 # This is the core component that handles yt-dlp operations
 downloader = MediaDownloader()
 
+def open_and_unlink(filepath: str):
+    """
+    Open a downloaded file and remove its directory entry right away
+    The open handle keeps the data readable until it's closed, and the
+    kernel frees the space then - even if the server dies mid-transfer
+    
+    Returns:
+        Tuple of (binary file object, os.stat_result)
+    """
+    f = open(filepath, "rb", buffering=0)
+    try:
+        stat_result = os.fstat(f.fileno())
+        os.unlink(filepath)
+    except BaseException:
+        f.close()
+        raise
+    return f, stat_result
+
+def read_file_chunks(f):
+    """
+    Yield an open file in STREAM_CHUNK_SIZE pieces, closing it when done
+    Starlette runs sync iterators in its threadpool, so reads don't block
+    the event loop
+    """
+    with f:
+        while chunk := f.read(AppConfig.STREAM_CHUNK_SIZE):
+            yield chunk
+
+def content_disposition(filename: str) -> str:
+    """
+    Build an attachment Content-Disposition header for the filename
+    Titles can be non-ASCII, which needs the RFC 5987 filename* form
+    """
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+async def unlinked_file_response(filepath: str, filename: str, media_type: str, headers=None) -> StreamingResponse:
+    """
+    Stream a downloaded file to the user, deleting it before sending starts
+    No background task is needed, so a crash can't leave the file behind
+    
+    Args:
+        filepath: Path of the downloaded file
+        filename: Name the user's browser should save it as
+        media_type: Content type of the file
+        headers: Extra response headers
+        
+    Returns:
+        StreamingResponse over the (already unlinked) file
+    
+    Raises:
+        FileNotFoundError: If the file doesn't exist (anymore)
+    """
+    f, stat_result = await asyncio.to_thread(open_and_unlink, filepath)
+    return StreamingResponse(
+        read_file_chunks(f),
+        media_type=media_type,
+        headers={
+            **(headers or {}),
+            "Content-Length": str(stat_result.st_size),
+            "Content-Disposition": content_disposition(filename)
+        }
+    )
+
+# Request validation constants, built once instead of per request
+_URL_PREFIXES = ('http://', 'https://')
+_VALID_FORMATS = frozenset(AppConfig.SUPPORTED_FORMATS)
+_VALID_FORMATS_TEXT = ", ".join(AppConfig.SUPPORTED_FORMATS)
+
+# Where downloaded files live, without a trailing slash so file paths can
+# be built with a plain f-string (route filenames can't contain "/")
+_DOWNLOADS_DIR = AppConfig.DOWNLOADS_DIR.rstrip("/")
+
+# MIME type for each downloadable file extension (see download_file)
+_CONTENT_TYPES_BY_EXT = {
+    ".mp4": "video/mp4",
+    ".mp3": "audio/mpeg",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+}
+
+# Platforms shown on the frontend (see /api/platforms)
+# The list never changes, so the JSON body is serialized once
+_PLATFORMS_JSON = json.dumps({
+    "platforms": [
+        "YouTube",
+        "Instagram", 
+        "Twitter/X",
+        "Pinterest",
+        "TikTok",
+        "Facebook",
+        "And many more via yt-dlp"
+    ]
+}).encode()
+
+# Background cleanup state (see cleanup_downloads and start_cleanup)
+_last_cleanup = 0.0
+_cleanup_task = None
+
 # Pydantic models for request validation
 # These define the structure of data we expect from frontend
 class DownloadRequest(BaseModel):
     url: str  # The media URL user wants to download
     format: str  # MP4, MP3, or IMAGE
     quality: str = "best"  # Video quality preference
+    
+    @field_validator("url")
+    @classmethod
+    def check_url(cls, url: str) -> str:
+        """
+        Reject anything that isn't an http(s) URL before a handler runs
+        """
+        if not url.startswith(_URL_PREFIXES):
+            raise ValueError("Please provide a valid URL starting with http:// or https://")
+        return url
+    
+    @field_validator("format")
+    @classmethod
+    def check_format(cls, format_type: str) -> str:
+        """
+        Normalize the format to upper case and make sure we support it
+        """
+        format_type = format_type.upper()
+        if format_type not in _VALID_FORMATS:
+            raise ValueError(f"Invalid format. Please choose from: {_VALID_FORMATS_TEXT}")
+        return format_type
 
 class DownloadResponse(BaseModel):
     success: bool
@@ -50,6 +319,27 @@ class DownloadResponse(BaseModel):
     download_url: str = ""
     filename: str = ""
 
+# Invalid requests get the same JSON shape as our other failures
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError):
+    """
+    Turn request validation errors into a readable failure response
+    The frontend shows "message" (or "error") to the user, so put the
+    first validator message there and keep FastAPI's usual "detail"
+    """
+    errors = exc.errors()
+    first = errors[0] if errors else {}
+    message = str(first.get("ctx", {}).get("error", first.get("msg", "Invalid request")))
+    return JSONResponse(
+        status_code=422,
+        content={
+            "success": False,
+            "message": message,
+            "error": message,
+            "detail": jsonable_encoder(errors)
+        }
+    )
+
 # Root endpoint - serves our main HTML page
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -58,11 +348,19 @@ async def root():
     This is what users see when they visit our site
     """
     try:
-        with open("static/index.html", "r") as f:
-            return HTMLResponse(content=f.read())
+        return HTMLResponse(content=_load_index_html())
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Frontend not found")
 
+@functools.lru_cache(maxsize=1)
+def _load_index_html() -> bytes:
+    """
+    Read the frontend page once and keep it in memory
+    Later requests are served without touching the disk
+    """
+    with open("static/index.html", "rb") as f:
+        return f.read()
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -86,30 +384,16 @@ async def download_media(request: DownloadRequest):
         DownloadResponse with success status and file information
     """
     try:
-        logger.info(f"Download request received: {request.url}, format: {request.format}")
+        logger.info("Download request received: %s, format: %s", request.url, request.format)
         
-        # Validate the URL format
-        # Basic check to ensure we have a valid URL
-        if not request.url or not request.url.startswith(('http://', 'https://')):
-            return DownloadResponse(
-                success=False,
-                message="Please provide a valid URL starting with http:// or https://"
-            )
-        
-        # Validate format selection
-        # Ensure user selected a supported format
-        valid_formats = ['MP4', 'MP3', 'IMAGE']
-        if request.format.upper() not in valid_formats:
-            return DownloadResponse(
-                success=False,
-                message=f"Invalid format. Please choose from: {', '.join(valid_formats)}"
-            )
+        # URL and format were already validated (and the format upper-cased)
+        # by DownloadRequest
         
         # Attempt to download the media
         # This calls our downloader service to handle the actual download
         result = await downloader.download_media(
             url=request.url,
-            format_type=request.format.upper(),
+            format_type=request.format,
             quality=request.quality
         )
         
@@ -130,7 +414,7 @@ async def download_media(request: DownloadRequest):
             
     except Exception as e:
         # Handle any unexpected errors
-        logger.error(f"Download error: {str(e)}")
+        logger.error("Download error: %s", e)
         return DownloadResponse(
             success=False,
             message=f"An error occurred during download: {str(e)}"
@@ -144,11 +428,7 @@ async def get_media_info(request: DownloadRequest):
     This helps show users what they're about to download
     """
     try:
-        logger.info(f"Media info request: {request.url}")
-        
-        # Validate URL
-        if not request.url or not request.url.startswith(('http://', 'https://')):
-            raise HTTPException(status_code=400, detail="Invalid URL")
+        logger.info("Media info request: %s", request.url)
         
         # Get media information using downloader
         info = await downloader.get_media_info(request.url)
@@ -166,7 +446,7 @@ async def get_media_info(request: DownloadRequest):
             return {"success": False, "error": info["error"]}
             
     except Exception as e:
-        logger.error(f"Media info error: {str(e)}")
+        logger.error("Media info error: %s", e)
         return {"success": False, "error": str(e)}
 
 # Stream download endpoint (no file persistence)
@@ -177,99 +457,75 @@ async def stream_download(request: DownloadRequest):
     This ensures no data persistence and faster delivery
     """
     try:
-        logger.info(f"Stream download request: {request.url}")
-        
-        # Validate inputs
-        if not request.url or not request.url.startswith(('http://', 'https://')):
-            raise HTTPException(status_code=400, detail="Invalid URL")
+        logger.info("Stream download request: %s", request.url)
         
         # Get the downloaded file stream
         result = await downloader.stream_download_media(
             url=request.url,
-            format_type=request.format.upper(),
+            format_type=request.format,
             quality=request.quality
         )
         
         if result["success"]:
-            # Return streaming response
-            return StreamingResponse(
-                result["stream"],
-                media_type=result["content_type"],
-                headers={"Content-Disposition": f"attachment; filename={result['filename']}"}
+            if "stream" in result:
+                # Return streaming response
+                return StreamingResponse(
+                    result["stream"],
+                    media_type=result["content_type"],
+                    headers={"Content-Disposition": content_disposition(result["filename"])}
+                )
+            
+            # File was downloaded to disk - it's unlinked as soon as it's
+            # opened, so nothing is left behind once the stream is closed
+            return await unlinked_file_response(
+                result["filepath"],
+                result["filename"],
+                result["content_type"]
             )
         else:
             raise HTTPException(status_code=400, detail=result["error"])
             
     except Exception as e:
-        logger.error(f"Stream download error: {str(e)}")
+        logger.error("Stream download error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 # Custom download endpoint with auto-delete
 @app.get("/downloads/{filename}")
-async def download_file(filename: str, background_tasks: BackgroundTasks):
+async def download_file(filename: str):
     """
     Serve downloaded files and automatically delete them after delivery
     This ensures no data persistence on the server
     """
     try:
-        filepath = os.path.join(AppConfig.DOWNLOADS_DIR, filename)
-        
-        # Check if file exists
-        if not os.path.exists(filepath):
-            raise HTTPException(status_code=404, detail="File not found")
-        
-        # Get file size for proper headers
-        file_size = os.path.getsize(filepath)
+        filepath = f"{_DOWNLOADS_DIR}/{filename}"
         
         # Determine content type based on file extension
-        content_type = "application/octet-stream"
-        if filename.lower().endswith('.mp4'):
-            content_type = "video/mp4"
-        elif filename.lower().endswith('.mp3'):
-            content_type = "audio/mpeg"
-        elif filename.lower().endswith(('.jpg', '.jpeg')):
-            content_type = "image/jpeg"
-        elif filename.lower().endswith('.png'):
-            content_type = "image/png"
-        elif filename.lower().endswith('.webp'):
-            content_type = "image/webp"
-        
-        # Schedule file deletion after response is sent
-        background_tasks.add_task(delete_file_after_download, filepath)
+        ext = os.path.splitext(filename)[1].lower()
+        content_type = _CONTENT_TYPES_BY_EXT.get(ext, "application/octet-stream")
         
-        logger.info(f"Serving file: {filename} ({file_size} bytes) - will auto-delete")
+        # The file is opened and deleted in one step; the open handle keeps
+        # it readable while we stream it (see unlinked_file_response)
+        try:
+            response = await unlinked_file_response(
+                filepath,
+                filename,
+                content_type,
+                headers={
+                    "Cache-Control": "no-cache, no-store, must-revalidate",
+                    "Pragma": "no-cache",
+                    "Expires": "0"
+                }
+            )
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="File not found")
         
-        # Return file with proper headers
-        return FileResponse(
-            path=filepath,
-            media_type=content_type,
-            filename=filename,
-            headers={
-                "Content-Length": str(file_size),
-                "Cache-Control": "no-cache, no-store, must-revalidate",
-                "Pragma": "no-cache",
-                "Expires": "0"
-            }
-        )
+        logger.info("Serving file: %s (%s bytes) - already unlinked", filename, response.headers['content-length'])
+        return response
         
     except Exception as e:
-        logger.error(f"Error serving file {filename}: {str(e)}")
+        logger.error("Error serving file %s: %s", filename, e)
         raise HTTPException(status_code=500, detail="Failed to serve file")
 
-def delete_file_after_download(filepath: str):
-    """
-    Background task to delete file after successful download
-    This ensures no data persistence on the server
-    """
-    try:
-        if os.path.exists(filepath):
-            os.remove(filepath)
-            logger.info(f"✅ Auto-deleted file: {filepath}")
-        else:
-            logger.warning(f"File already deleted: {filepath}")
-    except Exception as e:
-        logger.error(f"Failed to delete file {filepath}: {str(e)}")
-
 # Get list of supported platforms
 @app.get("/api/platforms")
 async def get_supported_platforms():
@@ -277,17 +533,7 @@ async def get_supported_platforms():
     Returns list of supported platforms for frontend display
     Helps users know which sites they can download from
     """
-    return {
-        "platforms": [
-            "YouTube",
-            "Instagram", 
-            "Twitter/X",
-            "Pinterest",
-            "TikTok",
-            "Facebook",
-            "And many more via yt-dlp"
-        ]
-    }
+    return Response(content=_PLATFORMS_JSON, media_type="application/json")
 
 # Clean up old files endpoint
 @app.post("/api/cleanup")
@@ -296,62 +542,146 @@ async def cleanup_downloads():
     Removes old downloaded files to save disk space
     This prevents our server from filling up with old downloads
     """
+    global _last_cleanup
+    
+    # A sweep just ran - don't hit the disk again for every repeated call
+    if time.monotonic() - _last_cleanup < AppConfig.CLEANUP_MIN_INTERVAL:
+        return {
+            "success": True,
+            "message": "Cleanup already ran recently"
+        }
+    
     try:
-        downloads_dir = "downloads"
-        if os.path.exists(downloads_dir):
+        downloads_dir = _DOWNLOADS_DIR
+        
+        def remove_files():
             files_removed = 0
-            for filename in os.listdir(downloads_dir):
-                if filename != ".gitkeep":  # Keep our directory placeholder
-                    file_path = os.path.join(downloads_dir, filename)
-                    os.remove(file_path)
-                    files_removed += 1
+            # scandir hands back full paths and cached file types, so each
+            # entry costs just the unlink
+            with os.scandir(downloads_dir) as entries:
+                for entry in entries:
+                    # Keep our directory placeholder
+                    if entry.name != ".gitkeep" and entry.is_file(follow_symlinks=False):
+                        os.unlink(entry.path)
+                        files_removed += 1
+            return files_removed
+        
+        def swap_out_dir():
+            # Move the whole directory aside in one rename and start a fresh,
+            # empty one; the old files are deleted afterwards
+            purge_dir = f"{downloads_dir}.purging.{os.getpid()}.{time.monotonic_ns()}"
+            os.rename(downloads_dir, purge_dir)
+            os.makedirs(downloads_dir, exist_ok=True)
+            # Keep our directory placeholder
+            try:
+                os.rename(f"{purge_dir}/.gitkeep", f"{downloads_dir}/.gitkeep")
+            except FileNotFoundError:
+                pass
+            return purge_dir
+        
+        if os.path.exists(downloads_dir):
+            # Disk work stays off the event loop
+            try:
+                purge_dir = await asyncio.to_thread(swap_out_dir)
+            except OSError as e:
+                # The directory can't be renamed (e.g. it's a mount point),
+                # so delete the files one by one instead
+                logger.warning("Could not swap out downloads dir, deleting files: %s", e)
+                files_removed = await asyncio.to_thread(remove_files)
+                _last_cleanup = time.monotonic()
+                return {
+                    "success": True,
+                    "message": f"Cleaned up {files_removed} files"
+                }
+            
+            # Don't wait for the old directory to be deleted
+            asyncio.get_running_loop().run_in_executor(None, shutil.rmtree, purge_dir, True)
+            _last_cleanup = time.monotonic()
             
             return {
                 "success": True,
-                "message": f"Cleaned up {files_removed} files"
+                "message": "Cleaned up downloads directory"
             }
         return {
             "success": True,
             "message": "Downloads directory is already clean"
         }
     except Exception as e:
-        logger.error(f"Cleanup error: {str(e)}")
+        logger.error("Cleanup error: %s", e)
         return {
             "success": False,
             "message": f"Cleanup failed: {str(e)}"
         }
 
-def cleanup_old_files():
+def cleanup_old_files(max_age: Optional[float] = None):
     """
     Clean up any old files that might have been missed
-    This runs on server startup to ensure clean state
+    This runs on server startup and then periodically (see periodic_cleanup)
+    
+    Args:
+        max_age: Only remove files last modified more than this many seconds
+                 ago (None removes every file)
     """
     try:
-        downloads_dir = "downloads"
+        downloads_dir = _DOWNLOADS_DIR
         if os.path.exists(downloads_dir):
             files_cleaned = 0
-            for filename in os.listdir(downloads_dir):
-                if filename != ".gitkeep":  # Keep our directory placeholder
-                    file_path = os.path.join(downloads_dir, filename)
-                    try:
-                        os.remove(file_path)
-                        files_cleaned += 1
-                    except Exception as e:
-                        logger.error(f"Failed to clean up {file_path}: {e}")
+            cutoff = time.time() - max_age if max_age is not None else None
+            with os.scandir(downloads_dir) as entries:
+                for entry in entries:
+                    # Keep our directory placeholder
+                    if entry.name != ".gitkeep" and entry.is_file(follow_symlinks=False):
+                        try:
+                            # Leave recent files alone - they may still be
+                            # waiting to be picked up by the user
+                            if cutoff is not None and entry.stat().st_mtime > cutoff:
+                                continue
+                            os.unlink(entry.path)
+                            files_cleaned += 1
+                        except Exception as e:
+                            logger.error("Failed to clean up %s: %s", entry.path, e)
             
             if files_cleaned > 0:
-                logger.info(f"🧹 Cleaned up {files_cleaned} old files on startup")
+                logger.info("🧹 Cleaned up %s old files", files_cleaned)
     except Exception as e:
-        logger.error(f"Startup cleanup failed: {e}")
+        logger.error("Old file cleanup failed: %s", e)
+
+async def periodic_cleanup():
+    """
+    Remove abandoned downloads every few minutes
+    Files nobody fetched would otherwise pile up until the next restart
+    """
+    while True:
+        await asyncio.sleep(AppConfig.CLEANUP_INTERVAL)
+        await asyncio.to_thread(cleanup_old_files, AppConfig.CLEANUP_MAX_FILE_AGE)
+
+@app.on_event("startup")
+async def start_cleanup():
+    """
+    Clean up leftovers on startup and start the periodic cleanup task
+    Runs however the app is served (python main.py, uvicorn CLI, gunicorn)
+    """
+    global _cleanup_task
+    # Only files past the age limit - with several workers, another one may
+    # already be serving fresh downloads
+    await asyncio.to_thread(cleanup_old_files, AppConfig.CLEANUP_MAX_FILE_AGE)
+    _cleanup_task = asyncio.create_task(periodic_cleanup())
+
+@app.on_event("shutdown")
+async def stop_cleanup():
+    """
+    Stop the periodic cleanup task when the server shuts down
+    """
+    if _cleanup_task is not None:
+        _cleanup_task.cancel()
 
 # Run the server when this file is executed directly
 if __name__ == "__main__":
     # Create downloads directory if it doesn't exist
     # This ensures we have a place to store downloaded files
-    os.makedirs("downloads", exist_ok=True)
+    os.makedirs(_DOWNLOADS_DIR, exist_ok=True)
     
-    # Clean up any old files from previous runs
-    cleanup_old_files()
+    # Any old files from previous runs are cleaned up by the startup event
     
     print("🚀 Starting Multi-Platform Media Downloader")
     print("📱 Frontend will be available at: http://localhost:5000")
@@ -361,10 +691,24 @@ if __name__ == "__main__":
     
     # Start the server with uvicorn
     # Host 0.0.0.0 makes it accessible from outside the container
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=5000,
-        reload=True,  # Auto-reload on code changes during development
-        log_level="info"
-    )
+    if AppConfig.DEBUG:
+        # Development: a single auto-reloading worker
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=5000,
+            reload=True,  # Auto-reload on code changes during development
+            log_level="info"
+        )
+    else:
+        # Production: no reload; "auto" picks uvloop + httptools when they're
+        # installed (uvicorn[standard]) and falls back to asyncio + h11
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=5000,
+            loop="auto",
+            http="auto",
+            workers=AppConfig.WEB_WORKERS,
+            log_level="info"
+        )